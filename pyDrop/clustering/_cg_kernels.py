@@ -0,0 +1,35 @@
+"""
+=========================================================================================
+                                Coarse-Graining Kernels
+=========================================================================================
+Optional numba kernels that compute the bin ids of every column in a single fused,
+parallel pass over the samples. Only used by Bins when numba is installed and the
+input is large enough to amortize the thread start-up. Importing this module imports
+numba, so Bins only imports it on the first kernel dispatch.
+"""
+
+from numba import njit, prange
+
+# fastmath is left off: reciprocal division can move values that sit exactly
+# on a bin edge into the neighbouring bin, unlike the numpy path
+
+@njit(parallel=True, cache=True)
+def modulo_value_to_id(X, mod, rem, out):
+    """ModuloBins.value_to_id for every column of X, column j uses mod[j], rem[j]"""
+    for i in prange(X.shape[0]):
+        for j in range(X.shape[1]):
+            out[i,j] = (X[i,j] - rem[j]) // mod[j]
+
+@njit(parallel=True, cache=True)
+def linspace_value_to_id(X, min, max, step, n_bins, out):
+    """LinSpaceBins.value_to_id for every column of X, column j uses the
+    j-th entry of each parameter array"""
+    for i in prange(X.shape[0]):
+        for j in range(X.shape[1]):
+            value = X[i,j]
+            if value <= min[j]:
+                out[i,j] = 0
+            elif value > max[j]:
+                out[i,j] = n_bins[j]
+            else:
+                out[i,j] = (value - min[j]) // step[j]
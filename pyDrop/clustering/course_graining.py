@@ -15,13 +15,63 @@ KMCalico:
         trains on the original data with new center starting locations. 
 """
 
-from copy import deepcopy
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
 import numpy as np
+from sklearn.base import clone
 from sklearn.cluster import KMeans, OPTICS
-from sklearn.metrics.cluster import rand_score, homogeneity_score, completeness_score
+from sklearn.metrics.cluster import contingency_matrix, mutual_info_score
 
 from pyDrop.exceptions import ModelValueError, AmbiguousCGFunction
 
+# numba is only imported, through _cg_kernels, on the first kernel dispatch
+_NUMBA_AVAILABLE = find_spec("numba") is not None
+# smallest number of samples for which Bins dispatches to the kernels
+_KERNEL_MIN_SAMPLES = 2**16
+
+class BinsBase(ABC):
+    """Base class for custom coarse-graining functions with arbitrary bin edges.
+    Subclasses must define the edges property, a sorted array of
+    n_bins+1 bin edges, and the bin ids are found with a binary search
+    (np.searchsorted) so non-uniform bins stay in C. Any values less than
+    edges[0] are assigned the bin id of 0 and any values greater than or
+    equal to edges[-1] are assigned the bin id of n_bins, the same as
+    LinSpaceBins. 
+    Usage
+    -----
+    >>> class LogBins(BinsBase):
+    ...     @property
+    ...     def edges(self):
+    ...         return np.logspace(0, 4, 41)
+    >>> binf = LogBins()
+    >>> data = np.array([1253,254,3098,490])
+    >>> bins = binf.value_to_id(data)
+    >>> bin_centers = binf.id_to_bin_center(bins) # coarse-grained data
+    """
+    __slots__ = ()
+
+    @property
+    @abstractmethod
+    def edges(self):
+        """sorted array of the n_bins+1 bin edges"""
+
+    # ids can come in as floats, e.g. a column of a float array passed to Bins,
+    # and are cast to int64 before indexing the edges
+    def id_to_bin_start(self, idx):
+        edges = self.edges
+        idx = np.asarray(idx).astype(np.int64, copy=False)
+        return edges[np.clip(idx, 0, len(edges)-2)]
+
+    def id_to_bin_center(self, idx):
+        edges = self.edges
+        idx = np.clip(np.asarray(idx).astype(np.int64, copy=False), 0, len(edges)-2)
+        return (edges[idx] + edges[idx+1])*0.5
+
+    def value_to_id(self, value):
+        edges = self.edges
+        ids = np.searchsorted(edges, value, side='right') - 1
+        return np.clip(ids, 0, len(edges)-1).astype(np.int64, copy=False)
+
 class ModuloBins:
     """Coarse Grains data using the same behavior as the modulo operator.
     CG is performed using a modulo(mod) and remainder(rem) to calculate 
@@ -39,23 +89,22 @@ class ModuloBins:
     >>> bins = binf.value_to_id(ids) 
     >>> bin_centers = binf.id_to_bin_center(bins) # coarse-grained data
     """
+    __slots__ = ('mod', 'rem')
+
     def __init__(self, mod: int=100, rem: int=0):
         self.mod = mod
         self.rem = rem
 
-        # Bin finding/evaluating functions to be called with np.arrays
-        self.id_to_bin_start = np.vectorize(self._id_to_bin_start)
-        self.id_to_bin_center = np.vectorize(self._id_to_bin_center)
-        self.value_to_id = np.vectorize(self._value_to_id)
-
-    def _id_to_bin_start(self, idx: int):
-        return float(idx*self.mod + self.rem)
+    # Bin finding/evaluating functions, plain ufunc arithmetic so they can be
+    # called with scalars or np.arrays of any shape
+    def id_to_bin_start(self, idx):
+        return np.add(np.multiply(idx, self.mod), self.rem).astype(np.float64, copy=False)
     
-    def _id_to_bin_center(self, idx: int):
-        return float(idx*self.mod + self.rem) + self.mod/2
+    def id_to_bin_center(self, idx):
+        return self.id_to_bin_start(idx) + self.mod*0.5
     
-    def _value_to_id(self, value: float):
-        return int((value-self.rem)/self.mod)
+    def value_to_id(self, value):
+        return np.floor_divide(np.subtract(value, self.rem), self.mod).astype(np.int64, copy=False)
     
 class LinSpaceBins:
     """Coarse Grains data from bin created from a linear space of the data.
@@ -78,41 +127,32 @@ class LinSpaceBins:
     >>> bins = binf.value_to_id(ids) 
     >>> bin_centers = binf.id_to_bin_center(bins) # coarse-grained data
     """
+    __slots__ = ('min', 'max', 'n_bins', 'step')
+
     def __init__(self, min: float, max: float, n_bins: int=100):
         self.min = min
         self.max = max
         self.n_bins = n_bins
 
-        self.step = float(max-min)/n_bins
+        self.step = (max-min)/n_bins
 
-        # Bin finding/evaluating functions to be called with np.arrays
-        self.id_to_bin_start = np.vectorize(self._id_to_bin_start)
-        self.id_to_bin_center = np.vectorize(self._id_to_bin_center)
-        self.value_to_id = np.vectorize(self._value_to_id)
-    
-    def _id_to_bin_start(self, idx: int):
-        if idx >= self.n_bins:
-            return self.max - self.step # format goes from [min, max)
-        elif idx < 0:
-            return self.min
-        else:
-            return self.min + idx*self.step
+    # Bin finding/evaluating functions, out of range ids/values are clamped
+    # with np.clip/np.where instead of per-element branches. The parameters
+    # may also be 1-D arrays with one entry per column (see Bins)
+    def id_to_bin_start(self, idx):
+        starts = self.min + np.clip(idx, 0, self.n_bins-1)*self.step
+        return np.where(idx >= self.n_bins, self.max - self.step, starts) # format goes from [min, max)
     
-    def _id_to_bin_center(self, idx: int):
-        if idx >= self.n_bins:
-            return self.max - (self.step/2)
-        elif idx < 0:
-            return self.min + (self.step/2)
-        else:
-            return self.min + idx*self.step + self.step/2
+    def id_to_bin_center(self, idx):
+        centers = self.min + np.clip(idx, 0, self.n_bins-1)*self.step + self.step*0.5
+        return np.where(idx >= self.n_bins, self.max - self.step*0.5, centers)
     
-    def _value_to_id(self, value: float):
-        if value <= self.min:
-            return 0
-        elif value > self.max:
-            return self.n_bins
-        else:
-            return int((value - self.min) // self.step)
+    def value_to_id(self, value):
+        # out of range values (e.g. inf, 1e300) overflow the cast but are overwritten below
+        with np.errstate(invalid='ignore', over='ignore'):
+            ids = np.floor_divide(np.subtract(value, self.min), self.step).astype(np.int64)
+        ids = np.where(value <= self.min, 0, ids)
+        return np.where(value > self.max, self.n_bins, ids)
     
 class ArrangeBins(LinSpaceBins):
     """Coarse Grains data from bin created from a linear space of the data.
@@ -136,18 +176,26 @@ class ArrangeBins(LinSpaceBins):
     >>> bins = binf.value_to_id(ids) 
     >>> bin_centers = binf.id_to_bin_center(bins) # coarse-grained data
     """
+    __slots__ = ('_bins',)
+
     def __init__(self, min: float, max: float, step: float):
         self.min = min
         self.max = max
         self.step = step
 
-        self.bins = np.arange(self.min, self.max, self.step)
-        self.n_bins = len(self.bins)
+        # same length as np.arange(min, max, step) without allocating it
+        self.n_bins = int(np.ceil((max - min) / step))
+        self._bins = None
+
+    @property
+    def bins(self):
+        """start values of the bins, only allocated when first requested"""
+        if self._bins is None:
+            self._bins = np.arange(self.min, self.max, self.step)
+        return self._bins
 
-        # Bin finding/evaluating functions to be called with np.arrays
-        self.id_to_bin_start = np.vectorize(self._id_to_bin_start)
-        self.id_to_bin_center = np.vectorize(self._id_to_bin_center)
-        self.value_to_id = np.vectorize(self._value_to_id)
+# bin functions whose methods broadcast over arrays of any shape
+_BROADCASTING_BINFS = (ModuloBins, LinSpaceBins, BinsBase)
 
 class Bins:
     """Creates and Stores multiple coarse-graining functions for ease of use
@@ -165,6 +213,8 @@ class Bins:
     >>> ids = bins.value_to_id(data)
     >>> coarse_grained_data = bins.id_to_bin_center(ids)
     """
+    __slots__ = ('default_binf', 'bin_functions')
+
     def __init__(self, default_binf=ModuloBins):
         self.default_binf = default_binf
         self.bin_functions = []
@@ -172,8 +222,12 @@ class Bins:
     def add_axis(self, binf=None):
         """adds a single bin function.
         A valid bin function can include ModuloBins, LinSpaceBins, ArrangeBins, 
-        or any coarse-graining object with vectorized value_to_id, id_to_bin_start,
-        and id_to_bin_center methods to manipulate the data. 
+        subclasses of BinsBase that define their bin edges, or any coarse-graining 
+        object with vectorized value_to_id, id_to_bin_start, and id_to_bin_center 
+        methods to manipulate the data. Methods wrapped with np.vectorize should
+        pin their output dtype with otypes=[np.int64] (value_to_id) or
+        otypes=[np.float64] (id_to_bin_start, id_to_bin_center), otherwise the 
+        dtype is guessed from a trial call on the first element. 
         Parameters
         ----------
         binf : ModuloBins | ArrangeBins | LinSpaceBins, default=None
@@ -229,7 +283,112 @@ class Bins:
         """
         return self.bin_functions[axis]
     
-    #TODO: reduce the following functions a bit
+    def _stacked_binf(self):
+        """stacks the stored bin functions into a single bin function
+        when every axis uses the same kind of closed-form bin function, the
+        parameters of each axis are stacked into 1-D arrays so that all
+        columns can be evaluated with one broadcasted ufunc call. 
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        ModuloBins | LinSpaceBins | None
+            bin function with per-column parameters, or None when the stored
+            bin functions are mixed or custom
+        """
+        binfs = self.bin_functions
+        if all(isinstance(binf, ModuloBins) for binf in binfs):
+            return ModuloBins(mod=np.array([binf.mod for binf in binfs]),
+                              rem=np.array([binf.rem for binf in binfs]))
+        if all(isinstance(binf, LinSpaceBins) for binf in binfs):
+            stacked = LinSpaceBins(np.array([binf.min for binf in binfs]),
+                                   np.array([binf.max for binf in binfs]),
+                                   np.array([binf.n_bins for binf in binfs]))
+            # ArrangeBins defines its own step
+            stacked.step = np.array([binf.step for binf in binfs])
+            return stacked
+        return None
+
+    @staticmethod
+    def _kernel_value_to_id(stacked, values):
+        """computes the bin ids of all columns with the fused numba kernels
+        Parameters
+        ----------
+        stacked : ModuloBins | LinSpaceBins
+            bin function with per-column parameters from _stacked_binf
+        values : np.ndarray
+            values of shape (#samples, #features)
+        Returns
+        -------
+        np.ndarray
+            int64 array of bin ids of the same shape as values
+        """
+        from pyDrop.clustering import _cg_kernels
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        ids = np.empty(values.shape, dtype=np.int64)
+        if isinstance(stacked, ModuloBins):
+            _cg_kernels.modulo_value_to_id(values,
+                                           stacked.mod.astype(np.float64),
+                                           stacked.rem.astype(np.float64),
+                                           ids)
+        else:
+            _cg_kernels.linspace_value_to_id(values,
+                                             stacked.min.astype(np.float64),
+                                             stacked.max.astype(np.float64),
+                                             stacked.step.astype(np.float64),
+                                             stacked.n_bins.astype(np.int64),
+                                             ids)
+        return ids
+
+    def _apply_axes(self, method, arr, dtype):
+        """applies the bin function method <method> along each axis of arr
+        Parameters
+        ----------
+        method : str
+            one of "value_to_id", "id_to_bin_start" or "id_to_bin_center"
+        arr : np.ndarray
+            values or ids where the length of axis 1 is the same as the
+            number of bin function/axes currently stored.
+        dtype : np.dtype
+            dtype of the returned array
+        Returns
+        -------
+        np.ndarray
+            array where column i is method applied to arr[:,i] by the ith
+            bin function in self.bin_functions. 1-D input is treated as a
+            single column and returned with shape (#samples, 1)
+        """
+        if len(arr.shape) == 1:
+            arr = arr.reshape(-1, 1)
+        n_samples, n_features = arr.shape
+        assert n_features == len(self.bin_functions)
+
+        binfs = self.bin_functions
+        stacked = self._stacked_binf()
+        # the kernels compute in float64, so other input dtypes (e.g. int64
+        # values above 2**53) stay on the exact numpy path
+        use_kernel = stacked is not None and n_features > 1 and method == "value_to_id" \
+            and arr.dtype == np.float64 and _NUMBA_AVAILABLE and n_samples >= _KERNEL_MIN_SAMPLES
+
+        # a single axis, or every axis using the same instance, of a bin function
+        # known to broadcast: apply it to the whole array at once. Custom bin
+        # functions may expect 1-D columns and go through the per-axis loop
+        shared = binfs[0]
+        if isinstance(shared, _BROADCASTING_BINFS) and not use_kernel \
+                and all(binf is shared for binf in binfs):
+            return np.asarray(getattr(shared, method)(arr)).astype(dtype, copy=False)
+
+        if stacked is not None:
+            if use_kernel:
+                return self._kernel_value_to_id(stacked, arr)
+            return getattr(stacked, method)(arr).astype(dtype, copy=False)
+
+        out = np.zeros(arr.shape, dtype=dtype)
+        for binf, axis_idx in zip(binfs, range(n_features)):
+            out[:,axis_idx] = getattr(binf, method)(arr[:,axis_idx])
+        return out
+
     def id_to_bin_start(self, ids):
         """ converts a sequence of bin ids to bin start values
         returns an array of the same size as the input with bin start values
@@ -247,14 +406,7 @@ class Bins:
             start values of bins for ids[:,i] passed to the ith bin function
             in self.bin_functions
         """
-        if len(ids.shape) == 1:
-            ids = ids.reshape(-1, 1)
-        n_samples, n_features = ids.shape
-        assert n_features == len(self.bin_functions)
-        values = np.zeros(ids.shape)
-        for binf, axis_idx in zip(self.bin_functions, range(n_features)):
-            values[:,axis_idx] = binf.id_to_bin_start(ids[:,axis_idx])
-        return values
+        return self._apply_axes("id_to_bin_start", ids, np.float64)
     
     def id_to_bin_center(self, ids):
         """ converts a sequence of bin ids to bin center values
@@ -273,14 +425,7 @@ class Bins:
             center values of bins for ids[:,i] passed to the ith bin function
             in self.bin_functions
         """
-        if len(ids.shape) == 1:
-            ids = ids.reshape(-1, 1)
-        n_samples, n_features = ids.shape
-        assert n_features == len(self.bin_functions)
-        values = np.zeros(ids.shape)
-        for binf, axis_idx in zip(self.bin_functions, range(n_features)):
-            values[:,axis_idx] = binf.id_to_bin_center(ids[:,axis_idx])
-        return values
+        return self._apply_axes("id_to_bin_center", ids, np.float64)
     
     def value_to_id(self, values):
         """ converts a sequence of values to bin ids
@@ -298,14 +443,119 @@ class Bins:
             array of bin ids where column i corresponds to the bin ids
             for values[:,i] passed to the ith bin function in self.bin_functions
         """
-        if len(values.shape) == 1:
-            values = values.reshape(-1, 1)
-        n_samples, n_features = values.shape
-        assert n_features == len(self.bin_functions)
-        ids = np.zeros(values.shape)
-        for binf, axis_idx in zip(self.bin_functions, range(n_features)):
-            ids[:,axis_idx] = binf.value_to_id(values[:,axis_idx])
+        return self._apply_axes("value_to_id", values, np.int64)
+
+def _key_strides(lows, highs):
+    """returns the strides that pack rows of integer ids into int64 keys
+    the first column is the most significant digit so that sorting the keys
+    sorts the rows lexicographically, the same as np.unique(ids, axis=0).
+    Parameters
+    ----------
+    lows : np.ndarray
+        smallest id along each column
+    highs : np.ndarray
+        largest id along each column
+    Returns
+    -------
+    np.ndarray | None
+        int64 strides of shape (#features,), or None when the packed keys
+        would not fit in int64
+    """
+    # python ints so that wide id ranges cannot overflow the check itself
+    spans = [int(high) - int(low) + 1 for low, high in zip(lows, highs)]
+    n_keys = 1
+    for span in spans:
+        n_keys *= span
+    if n_keys > np.iinfo(np.int64).max:
+        return None
+    spans = np.array(spans, dtype=np.int64)
+    strides = np.ones(len(spans), dtype=np.int64)
+    strides[:-1] = np.cumprod(spans[:0:-1])[::-1]
+    return strides
+
+def _unpack_keys(keys, strides, offsets):
+    """inverse of the packing done with _key_strides, returns the rows of
+    ids of shape (#keys, #features) encoded by keys
+    """
+    ids = np.empty((len(keys), len(strides)), dtype=np.int64)
+    for axis_idx, stride in enumerate(strides):
+        ids[:,axis_idx], keys = np.divmod(keys, stride)
+    return ids + offsets
+
+def _unique_rows(ids):
+    """returns the unique rows of a 2-D integer array
+    each row is packed into a single int64 key so the dedup is a 1-D sort
+    instead of the row-wise comparison done by np.unique(ids, axis=0). The
+    rows come back in the same lexicographic order as np.unique(ids, axis=0).
+    When the keys do not fit in int64, each row is instead viewed as a single
+    void scalar for a 1-D np.unique and the rows are returned in order of
+    first occurrence.
+    Parameters
+    ----------
+    ids : np.ndarray
+        integer array of shape (#samples, #features)
+    Returns
+    -------
+    np.ndarray
+        unique rows of ids of shape (#unique, #features)
+    """
+    if ids.shape[0] == 0:
         return ids
+    offsets = ids.min(axis=0)
+    strides = _key_strides(offsets, ids.max(axis=0))
+    if strides is None:
+        ids = np.ascontiguousarray(ids)
+        rows = ids.view(np.dtype((np.void, ids.dtype.itemsize*ids.shape[1]))).ravel()
+        _, idx = np.unique(rows, return_index=True)
+        return ids[np.sort(idx)]
+
+    keys = np.unique((ids - offsets) @ strides)
+    return _unpack_keys(keys, strides, offsets).astype(ids.dtype, copy=False)
+
+def _entropy(counts):
+    """entropy (natural log) of a labelling given the number of samples per label"""
+    counts = counts[counts > 0]
+    p = counts/counts.sum()
+    return -(p*np.log(p)).sum()
+
+def _contingency_scores(y_true, y_pred):
+    """computes the supervised clustering scores from one contingency matrix
+    rand_score, homogeneity_score and completeness_score match the sklearn
+    metrics of the same name, which each rebuild the contingency matrix.
+    n_misclassified is the number of samples that do not belong to the most
+    common true label of their predicted cluster. 
+    Parameters
+    ----------
+    y_true : np.ndarray
+        true labels of the samples
+    y_pred : np.ndarray
+        predicted labels of the samples
+    Returns
+    -------
+    dict where keys=["rand_score", "homogeneity_score", "completeness_score", "n_misclassified"]
+    """
+    C = contingency_matrix(y_true, y_pred, sparse=True)
+    n_samples = int(C.sum())
+    true_counts = np.ravel(C.sum(axis=1))
+    pred_counts = np.ravel(C.sum(axis=0))
+
+    # pairs of samples grouped the same way by both labellings
+    n_pairs = n_samples*(n_samples-1)//2
+    sum_joint = (C.data*(C.data-1)//2).sum()
+    sum_true = (true_counts*(true_counts-1)//2).sum()
+    sum_pred = (pred_counts*(pred_counts-1)//2).sum()
+    n_agree = n_pairs + 2*sum_joint - sum_true - sum_pred
+    r_score = 1.0 if n_pairs == 0 or n_agree == n_pairs else n_agree/n_pairs
+
+    mi = mutual_info_score(None, None, contingency=C)
+    h_true = _entropy(true_counts)
+    h_pred = _entropy(pred_counts)
+
+    return {"rand_score": r_score,
+            "homogeneity_score": mi/h_true if h_true else 1.0,
+            "completeness_score": mi/h_pred if h_pred else 1.0,
+            "n_misclassified": n_samples - int(C.max(axis=0).sum())
+           }
 
 class CGCluster:
     """ A coarse-graining wrapper for any cluster model
@@ -313,6 +563,10 @@ class CGCluster:
     are added to accomodate the number of columns in the input data. The
     data is then coarse-grained and the given model is run. Can return the
     model and scores for the model with and without coarse-graining. 
+    The coarse-grained data only takes values on the grid of bin centers and
+    is passed to the model as float32, halving the memory traffic of the
+    model's distance computations. Calling predict on the fitted coarse_model 
+    directly therefore expects float32 input. 
     Parameters
     ----------
     bins : default=pydrop.clustering.Bins()
@@ -330,7 +584,7 @@ class CGCluster:
         self.bins = bins
         self.model = model
 
-        self.coarse_model = deepcopy(model)
+        self.coarse_model = clone(model, safe=False)
 
     def fit_uniform_coarse_grain(self, n_features, binf=ModuloBins(100)):
         """creates bin functions that matches the number of features of the 
@@ -349,15 +603,20 @@ class CGCluster:
         bin_functions = [binf]*n_features
         self.bins.add_axes(bin_functions)
 
-    def coarse_grain(self, X):
+    def coarse_grain(self, X, chunk_size: int=2**20):
         """Coarse grains the data 
         returns the centers of the bins that correspond to the input
         data and the specified bin functions. If no bin functions are specified, the 
-        default bin functions are applied uniformly to each axis. 
+        default bin functions are applied uniformly to each axis. The data is
+        processed chunk_size samples at a time and each chunk is deduplicated
+        before merging, so peak memory scales with the chunk size and the number
+        of unique bins rather than with the number of samples. 
         Parameters
         ----------
         X : np.ndarray
             input data of shape (#features, #samples)
+        chunk_size : int, default=2**20
+            number of samples coarse-grained at a time
         Returns
         -------
         np.ndarray
@@ -366,6 +625,9 @@ class CGCluster:
             the number of sampels given. 
         """
         n_samples, n_features = X.shape
+        # NaN/inf have no bin, casting them to int64 ids would silently land them in a valid bin
+        if not np.isfinite(X).all():
+            raise ValueError("cannot coarse grain non-finite (NaN or inf) values")
         n_defined_bins = self.bins.get_num_axes()
         if n_defined_bins == 0:
             print(f"no axes defined, using default ModuloBins bins for coarse-graining")
@@ -374,12 +636,13 @@ class CGCluster:
             raise AmbiguousCGFunction(f"ambiguous bins definition: {n_defined_bins} \
                                       axes defined for bins but there are {n_features} total axes.")
         
-        x_grained_bins = self.bins.value_to_id(X)
-        x_grained_bins = np.unique(x_grained_bins, axis=0)
+        chunks = [_unique_rows(self.bins.value_to_id(X[start:start+chunk_size]))
+                  for start in range(0, max(n_samples, 1), chunk_size)]
+        x_grained_bins = chunks[0] if len(chunks) == 1 else _unique_rows(np.concatenate(chunks))
         x_grained_centers = self.bins.id_to_bin_center(x_grained_bins)
 
         return x_grained_centers
-    
+
     def fit(self, X):
         """fits the data
         first coarse-grains the data using the given bin functions and
@@ -393,7 +656,7 @@ class CGCluster:
         None
         """
         x_grained_centers = self.coarse_grain(X)
-        self.coarse_model.fit(x_grained_centers)
+        self.coarse_model.fit(x_grained_centers.astype(np.float32))
 
     def predict(self, X, model="coarse"):
         """predicts the labels of the given data
@@ -412,7 +675,8 @@ class CGCluster:
         """
         y_pred = None
         if model=="coarse":
-            y_pred = self.coarse_model.predict(X)
+            # the coarse model is fitted on float32 coarse-grained data
+            y_pred = self.coarse_model.predict(np.asarray(X, dtype=np.float32))
         elif model=="default":
             y_pred = self.model.fit_predict(X)
         else:
@@ -432,16 +696,12 @@ class CGCluster:
         Returns
         -------
         dict where keys=["rand_score", "homogeneity_score", "completeness_score", "n_misclassified"]
-            dictionary of scores returned on the given data
+            dictionary of scores returned on the given data. n_misclassified
+            counts the samples outside the majority true label of their
+            predicted cluster
         """
         y_pred = self.predict(X, model=model)
-        r_score = rand_score(y_true, y_pred)
-        scores = {"rand_score": r_score,
-                  "homogeneity_score": homogeneity_score(y_true, y_pred),
-                  "completeness_score": completeness_score(y_true, y_pred),
-                  "n_misclassified": len(y_true)*(1-r_score)
-                 }
-        return scores
+        return _contingency_scores(y_true, y_pred)
 
 class KMCalico(CGCluster):
     """ A coarse-graining wrapper for the KNN Calico method
@@ -449,7 +709,10 @@ class KMCalico(CGCluster):
     are added to accomodate the number of columns in the input data. The
     data is then coarse-grained and cluster centers are obtained using KMeans.
     Finally, those centers are used as input to a final KMeans model acting on
-    the original (not coarse-grained) data. 
+    the original (not coarse-grained) data. Both models are trained on 
+    float32 data so KMeans runs its distance computations in single precision, 
+    calling predict on the fitted coarse_model and fine_model directly therefore 
+    expects float32 input. 
     Parameters
     ----------
     bins : default=pydrop.clustering.Bins()
@@ -458,26 +721,35 @@ class KMCalico(CGCluster):
         can be any clustering Kmeans model with fit, predict, and
         fitpredict methods. Cluster centers must be obtainable with
         a model.cluster_centers_ variable. 
+    warm_start : bool, default=False
+        when True, refitting skips the fine KMeans fit if every new coarse
+        center coordinate is within fine_model.tol times the mean feature
+        variance of X (the tolerance KMeans itself uses) of the coarse centers
+        from the previous fit, and the previous fine model is kept
     Usage
     -----
     >>> model = KMCalico()
     >>> model.fit(data)
     >>> y_pred = model.predict(data, model="fine")
     """
-    def __init__(self, bins=Bins(), k_means_model=KMeans()):
+    def __init__(self, bins=Bins(), k_means_model=KMeans(), warm_start: bool=False):
         """
 
         """
         # initialize data and the expected number of clusters 
         self.bins = bins
         self.model = k_means_model
+        self.warm_start = warm_start
 
-        self.coarse_model = deepcopy(k_means_model)
+        self.coarse_model = clone(k_means_model, safe=False)
         self.coarse_model.set_params(n_init='auto')
 
-        self.fine_model = deepcopy(k_means_model)
+        self.fine_model = clone(k_means_model, safe=False)
         self.fine_model.set_params(n_init=1)
 
+        # coarse centers the fine model was last initialized with
+        self._last_centers = None
+
     def fit(self, X):
         """fits the data using the Calico algorithm
         first coarse-grains the data using the given bin functions and
@@ -493,11 +765,20 @@ class KMCalico(CGCluster):
         None
         """
         x_grained_centers = self.coarse_grain(X)
-        self.coarse_model.fit(x_grained_centers)
+        self.coarse_model.fit(x_grained_centers.astype(np.float32))
         coarse_centers = self.coarse_model.cluster_centers_
 
+        # the fine fit would start from (nearly) the same centers as last time,
+        # tol is scaled by the data variance the same way KMeans scales it
+        if self.warm_start and self._last_centers is not None \
+                and self._last_centers.shape == coarse_centers.shape:
+            tol = self.fine_model.tol * np.mean(np.var(X, axis=0))
+            if np.allclose(self._last_centers, coarse_centers, rtol=0, atol=tol):
+                return
+
         self.fine_model.set_params(init=coarse_centers)
-        self.fine_model.fit(X)
+        self.fine_model.fit(X.astype(np.float32, copy=False))
+        self._last_centers = coarse_centers
 
     def predict(self, X, model="fine", return_centers=False):
         """predicts the labels of the given data
@@ -512,15 +793,17 @@ class KMCalico(CGCluster):
         Returns
         -------
         np.ndarray
-            array of labels predicted from the given data
+            array of labels predicted from the given data, followed by the 
+            float64 cluster centers of the model when return_centers=True
         """
         y_pred = None
         centers = None
+        # the coarse and fine models are both fitted on float32 data
         if model=="fine":
-            y_pred = self.fine_model.predict(X)
+            y_pred = self.fine_model.predict(np.asarray(X, dtype=np.float32))
             centers = self.fine_model.cluster_centers_
         elif model=="coarse":
-            y_pred = self.coarse_model.predict(X)
+            y_pred = self.coarse_model.predict(np.asarray(X, dtype=np.float32))
             centers = self.coarse_model.cluster_centers_
         elif model=="default":
             y_pred = self.model.fit_predict(X)
@@ -528,7 +811,7 @@ class KMCalico(CGCluster):
         else:
             raise ModelValueError("model must be fine, coarse, or default")
         if return_centers:
-            return y_pred, centers
+            return y_pred, centers.astype(np.float64, copy=False)
         else:
             return y_pred
 
@@ -17,6 +17,7 @@ setuptools.setup(
 
     packages=setuptools.find_namespace_packages(where="pyDrop/pyDrop"),
     include_package_data=True,
+    extras_require={"numba": ["numba"]},
 
     classifiers=[
         "Development Status :: 1 - Alpha",
@@ -1,45 +1,134 @@
 """
 pytest script to test coarse-graining, binning, and KNNCalico
 """
+import subprocess
+import sys
+import warnings
+
 import pytest
 
+from sklearn.cluster import BisectingKMeans
 from sklearn.datasets import make_blobs
+from sklearn.exceptions import NotFittedError
+from sklearn.metrics.cluster import rand_score, homogeneity_score, completeness_score
 from pyDrop.clustering import *
+from pyDrop.clustering.course_graining import _unique_rows, _contingency_scores
 
 def test_modulo_bins():
     binf1 = ModuloBins(mod=100, rem=0)
     binf2 = ModuloBins(mod=25, rem=10)
-    assert binf1._id_to_bin_start(1) == 100
-    assert binf1._id_to_bin_center(1) == 150
-    assert binf1._value_to_id(1234) == 12
+    assert binf1.id_to_bin_start(1) == 100
+    assert binf1.id_to_bin_center(1) == 150
+    assert binf1.value_to_id(1234) == 12
+
+    assert binf2.id_to_bin_start(1) == 35
+    assert binf2.id_to_bin_center(1) == 47.5
+    assert binf2.value_to_id(61) == 2
+
+    ids = binf1.value_to_id(np.array([1253, 254, 3098, 490, -20]))
+    assert ids.dtype == np.int64
+    assert (ids == np.array([12, 2, 30, 4, -1])).all()
+    assert (binf1.id_to_bin_center(ids) == np.array([1250., 250., 3050., 450., -50.])).all()
+
+def test_modulo_bins_integer_ids():
+    binf = ModuloBins(mod=64, rem=3)
+    values = np.arange(-300, 300)
+    ids = binf.value_to_id(values)
+    assert ids.dtype == np.int64
+    assert (ids == (values - 3) // 64).all()
+    assert (ids == binf.value_to_id(values.astype(np.float64))).all()
+    assert (binf.id_to_bin_start(ids) == ids*64. + 3).all()
+    assert (binf.id_to_bin_center(ids) == ids*64. + 35).all()
+    assert binf.id_to_bin_start(np.array([100], dtype=np.uint64))[0] == 6403.
 
-    assert binf2._id_to_bin_start(1) == 35
-    assert binf2._id_to_bin_center(1) == 47.5
-    assert binf2._value_to_id(61) == 2
+def test_bins_slots():
+    for binf in (ModuloBins(), LinSpaceBins(0, 10), ArrangeBins(0, 10, 1), Bins()):
+        with pytest.raises(AttributeError):
+            binf.n_bin = 10
 
 def test_linspace_bins():
     binf = LinSpaceBins(12, 113, 100)
-    assert binf._id_to_bin_start(0) == 12
-    assert binf._id_to_bin_start(-2) == 12
-    assert binf._id_to_bin_start(100) == 111.99
-    assert binf._id_to_bin_start(101) == 111.99
-    assert binf._id_to_bin_center(101) == 112.495
-    assert binf._value_to_id(65) == 52
-    assert binf._value_to_id(12) == 0
-    assert binf._value_to_id(10) == 0
-    assert binf._value_to_id(114) == 100
+    assert binf.id_to_bin_start(0) == 12
+    assert binf.id_to_bin_start(-2) == 12
+    assert binf.id_to_bin_start(100) == 111.99
+    assert binf.id_to_bin_start(101) == 111.99
+    assert binf.id_to_bin_center(101) == 112.495
+    assert binf.value_to_id(65) == 52
+    assert binf.value_to_id(12) == 0
+    assert binf.value_to_id(10) == 0
+    assert binf.value_to_id(114) == 100
+
+    ids = binf.value_to_id(np.array([10, 12, 65, 112, 114]))
+    assert ids.dtype == np.int64
+    assert (ids == np.array([0, 0, 52, 99, 100])).all()
+    assert np.isclose(binf.id_to_bin_start(np.array([-2, 0, 52, 100])),
+                      np.array([12, 12, 64.52, 111.99])).all()
+
+def test_linspace_bins_out_of_range():
+    binf = LinSpaceBins(12, 113, 100)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ids = binf.value_to_id(np.array([-np.inf, -1e300, 65, 1e300, np.inf]))
+    assert (ids == np.array([0, 0, 52, 100, 100])).all()
 
 def test_arrange_bins():
     binf = ArrangeBins(12,113,101/100)
-    assert binf._id_to_bin_start(0) == 12
-    assert binf._id_to_bin_start(-2) == 12
-    assert binf._id_to_bin_start(100) == 111.99
-    assert binf._id_to_bin_start(101) == 111.99
-    assert binf._id_to_bin_center(101) == 112.495
-    assert binf._value_to_id(65) == 52
-    assert binf._value_to_id(12) == 0
-    assert binf._value_to_id(10) == 0
-    assert binf._value_to_id(114) == 100
+    assert binf.n_bins == len(binf.bins) == 100
+    assert binf.id_to_bin_start(0) == 12
+    assert binf.id_to_bin_start(-2) == 12
+    assert binf.id_to_bin_start(100) == 111.99
+    assert binf.id_to_bin_start(101) == 111.99
+    assert binf.id_to_bin_center(101) == 112.495
+    assert binf.value_to_id(65) == 52
+    assert binf.value_to_id(12) == 0
+    assert binf.value_to_id(10) == 0
+    assert binf.value_to_id(114) == 100
+
+def test_custom_bins():
+    class SquareBins(BinsBase):
+        @property
+        def edges(self):
+            return np.arange(11)**2
+
+    binf = SquareBins()
+    ids = binf.value_to_id(np.array([-5, 0, 3, 4, 50, 99.5, 100, 250]))
+    assert ids.dtype == np.int64
+    assert (ids == np.array([0, 0, 1, 2, 7, 9, 10, 10])).all()
+    assert (binf.id_to_bin_start(np.array([-1, 0, 7, 10])) == np.array([0, 0, 49, 81])).all()
+    assert (binf.id_to_bin_center(np.array([0, 7, 10])) == np.array([0.5, 56.5, 90.5])).all()
+
+    bins = Bins()
+    bins.add_axes([ModuloBins(100), binf])
+    values = np.array([[1253., 3.], [254., 50.]])
+    assert (bins.value_to_id(values) == np.array([[12, 1], [2, 7]])).all()
+    # float ids, e.g. from a float id array passed to a mixed Bins
+    assert (binf.id_to_bin_start(np.array([0., 7., 10.])) == np.array([0, 49, 81])).all()
+    assert binf.id_to_bin_center(7.) == 56.5
+    float_ids = np.array([[12., 1.], [2., 7.]])
+    assert (bins.id_to_bin_start(float_ids) == np.array([[1200., 1.], [200., 49.]])).all()
+    assert (bins.id_to_bin_center(float_ids) == np.array([[1250., 2.5], [250., 56.5]])).all()
+
+    class NoEdgeBins(BinsBase):
+        pass
+
+    with pytest.raises(TypeError):
+        NoEdgeBins()
+    with pytest.raises(TypeError):
+        BinsBase()
+
+def test_vectorized_custom_bins():
+    class HalfBins:
+        def __init__(self):
+            self.value_to_id = np.vectorize(lambda v: int(v*2), otypes=[np.int64])
+            self.id_to_bin_start = np.vectorize(lambda i: i/2, otypes=[np.float64])
+            self.id_to_bin_center = np.vectorize(lambda i: i/2 + 0.25, otypes=[np.float64])
+
+    bins = Bins()
+    bins.add_axes([ModuloBins(100), HalfBins()])
+    ids = bins.value_to_id(np.array([[1253., 1.3], [254., 2.]]))
+    assert ids.dtype == np.int64
+    assert (ids == np.array([[12, 2], [2, 4]])).all()
+    assert (bins.id_to_bin_center(ids) == np.array([[1250., 1.25], [250., 2.25]])).all()
 
 def test_multibins():
     bins = Bins()
@@ -65,6 +154,202 @@ def test_multibins():
                         [1300.,111.16363636,112.]])
     assert np.isclose(starts, cstarts).all()
 
+def test_single_axis_bins():
+    bins = Bins()
+    bins.add_axis(LinSpaceBins(12, 113, 100))
+    ids = bins.value_to_id(np.array([10, 12, 65, 114]))
+    assert ids.shape == (4, 1)
+    assert ids.dtype == np.int64
+    assert (ids[:,0] == np.array([0, 0, 52, 100])).all()
+    assert np.isclose(bins.id_to_bin_start(ids)[:,0], np.array([12, 12, 64.52, 111.99])).all()
+
+def test_stacked_bins():
+    values = np.array([[1253., 12., 14.5],
+                       [-254., 65., 113.],
+                       [3098., 114., 10.]])
+    for binfs in ([ModuloBins(100, 0), ModuloBins(25, 10), ModuloBins(7, 3)],
+                  [LinSpaceBins(12, 113, 110), ArrangeBins(12, 113, 1), LinSpaceBins(0, 50, 10)]):
+        bins = Bins()
+        bins.add_axes(binfs)
+        ids = bins.value_to_id(values)
+        assert ids.dtype == np.int64
+        for axis_idx, binf in enumerate(binfs):
+            assert (ids[:,axis_idx] == binf.value_to_id(values[:,axis_idx])).all()
+            assert np.isclose(bins.id_to_bin_start(ids)[:,axis_idx],
+                              binf.id_to_bin_start(ids[:,axis_idx])).all()
+            assert np.isclose(bins.id_to_bin_center(ids)[:,axis_idx],
+                              binf.id_to_bin_center(ids[:,axis_idx])).all()
+
+def test_kernel_value_to_id():
+    pytest.importorskip("numba")
+    from pyDrop.clustering import course_graining
+    n_samples = course_graining._KERNEL_MIN_SAMPLES
+    rng = np.random.default_rng(0)
+    shared = ModuloBins(100, 3)
+    class Edges(BinsBase):
+        edges = np.array([-100., 0., 5., 50., 200.])
+    shared_custom = Edges()
+    for binfs in ([ModuloBins(100, 0), ModuloBins(25, 10), ModuloBins(7, 3)],
+                  [LinSpaceBins(12, 113, 110), ArrangeBins(12, 113, 1), LinSpaceBins(0, 50, 10)],
+                  [shared, shared, shared],
+                  [shared_custom, shared_custom, shared_custom]):
+        bins = Bins()
+        bins.add_axes(binfs)
+        for values in (rng.normal(50, 60, size=(n_samples, 3)),
+                       rng.integers(-500, 500, size=(n_samples, 3)),
+                       rng.integers(2**53, 2**62, size=(n_samples, 3))):
+            ids = bins.value_to_id(values)
+            assert ids.dtype == np.int64
+            for axis_idx, binf in enumerate(binfs):
+                assert (ids[:,axis_idx] == binf.value_to_id(values[:,axis_idx])).all()
+
+def test_lazy_numba_import():
+    code = "import sys, pyDrop.clustering; assert 'numba' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_shared_bins():
+    binf = LinSpaceBins(12, 113, 100)
+    model = CGCluster(bins=Bins())
+    model.fit_uniform_coarse_grain(3, binf)
+    values = np.array([[10., 65., 114.], [12., 112., 50.]])
+    ids = model.bins.value_to_id(values)
+    assert ids.dtype == np.int64
+    assert (ids == binf.value_to_id(values)).all()
+    assert np.isclose(model.bins.id_to_bin_center(ids), binf.id_to_bin_center(ids)).all()
+
+    # sharing follows later edits of the public bin_functions list
+    bins = Bins()
+    binf = ModuloBins(100)
+    bins.add_axes([binf, binf])
+    bins.bin_functions[1] = ModuloBins(10)
+    assert (bins.value_to_id(np.array([[1234, 1234]])) == np.array([[12, 123]])).all()
+
+    # custom bin functions always receive 1-D columns
+    class ColumnBins:
+        def value_to_id(self, value):
+            assert value.ndim == 1
+            return (value // 10).astype(np.int64)
+
+    binf = ColumnBins()
+    for binfs in ([binf], [binf, binf]):
+        bins = Bins()
+        bins.add_axes(binfs)
+        values = np.array([[123., 45.], [6., 78.]])[:,:len(binfs)]
+        assert (bins.value_to_id(values) == values // 10).all()
+
+def test_unique_rows():
+    rng = np.random.default_rng(0)
+    ids = rng.integers(-20, 20, size=(5000, 3))
+    assert (_unique_rows(ids) == np.unique(ids, axis=0)).all()
+
+    wide = np.array([[2**62, 0], [0, 2**62], [2**62, 0], [-2**62, 1]])
+    assert (_unique_rows(wide) == np.array([[2**62, 0], [0, 2**62], [-2**62, 1]])).all()
+
+def test_coarse_grain_modulo():
+    rng = np.random.default_rng(0)
+    X = rng.normal(0, 3000, size=(5000, 3))
+    bins = Bins()
+    bins.add_axes([ModuloBins(100), ModuloBins(25, 10), ModuloBins(250, -3)])
+    model = CGCluster(bins=bins)
+    expected = bins.id_to_bin_center(np.unique(bins.value_to_id(X), axis=0))
+    x_grained_centers = model.coarse_grain(X)
+    assert x_grained_centers.dtype == np.float64
+    assert np.isclose(x_grained_centers, expected).all()
+
+def test_coarse_grain_non_finite():
+    for bad in (np.nan, np.inf, -np.inf):
+        X = np.array([[1253., 12.], [bad, 65.]])
+        for binfs in ([ModuloBins(100), ModuloBins(25)], [LinSpaceBins(0, 2000), LinSpaceBins(0, 100)]):
+            bins = Bins()
+            bins.add_axes(binfs)
+            model = CGCluster(bins=bins)
+            with pytest.raises(ValueError):
+                model.coarse_grain(X)
+            with pytest.raises(ValueError):
+                model.fit(X)
+
+def test_chunked_coarse_grain():
+    rng = np.random.default_rng(0)
+    X = rng.normal(0, 3000, size=(5000, 2))
+    for binfs in ([ModuloBins(100), ModuloBins(25, 10)],
+                  [LinSpaceBins(-5000, 5000, 80), ModuloBins(250)]):
+        bins = Bins()
+        bins.add_axes(binfs)
+        model = CGCluster(bins=bins)
+        assert (model.coarse_grain(X, chunk_size=777) == model.coarse_grain(X)).all()
+
+def test_predict():
+    X, y = make_blobs(n_samples=2000, n_features=2, centers=3, cluster_std=2, random_state=0)
+    X = X*100
+    model = KMCalico(bins=Bins(), k_means_model=KMeans(n_clusters=3, random_state=0))
+    with pytest.raises(NotFittedError):
+        model.predict(X, model="fine")
+    model.fit(X)
+    X32 = X.astype(np.float32)
+    assert (model.predict(X, model="fine") == model.fine_model.predict(X32)).all()
+    assert (model.predict(X, model="coarse") == model.coarse_model.predict(X32)).all()
+    assert model.predict(X, return_centers=True)[1].dtype == np.float64
+
+    model = CGCluster(bins=Bins(), model=BisectingKMeans(6, random_state=0))
+    with pytest.raises(NotFittedError):
+        model.predict(X)
+    model.fit(X)
+    assert (model.predict(X) == model.coarse_model.predict(X32)).all()
+
+def test_non_sklearn_model():
+    class ThresholdModel:
+        def fit(self, X):
+            self.threshold_ = X[:,0].mean()
+        def predict(self, X):
+            return (X[:,0] > self.threshold_).astype(int)
+
+    user_model = ThresholdModel()
+    model = CGCluster(bins=Bins(), model=user_model)
+    assert model.coarse_model is not user_model
+    X = np.array([[0., 0.], [50., 10.], [1000., 20.], [1100., 30.]])
+    model.fit(X)
+    assert (model.predict(X) == np.array([0, 0, 1, 1])).all()
+
+def test_warm_start():
+    X, y = make_blobs(n_samples=2000, n_features=2, centers=3, cluster_std=2, random_state=0)
+    X = X*100
+    model = KMCalico(bins=Bins(), k_means_model=KMeans(n_clusters=3, random_state=0), warm_start=True)
+    model.fit(X)
+    fine_centers = model.fine_model.cluster_centers_
+    model.fit(X)
+    assert model.fine_model.cluster_centers_ is fine_centers
+
+    # the tolerance follows the scale of the data, so small-valued data with
+    # different centers is refit
+    X_small, _ = make_blobs(n_samples=2000, n_features=2, centers=3, random_state=0)
+    X_other, _ = make_blobs(n_samples=2000, n_features=2, centers=3, random_state=1)
+    model = KMCalico(bins=Bins(), k_means_model=KMeans(n_clusters=3, random_state=0), warm_start=True)
+    model.fit_uniform_coarse_grain(2, LinSpaceBins(-2e-5, 2e-5, 100))
+    model.fit(X_small*1e-6)
+    fine_centers = model.fine_model.cluster_centers_
+    model.fit(X_other*1e-6)
+    assert model.fine_model.cluster_centers_ is not fine_centers
+
+    model = KMCalico(bins=Bins(), k_means_model=KMeans(n_clusters=3, random_state=0))
+    model.fit(X)
+    fine_centers = model.fine_model.cluster_centers_
+    model.fit(X)
+    assert model.fine_model.cluster_centers_ is not fine_centers
+
+def test_scores():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 3, 500)
+    y_pred = np.where(rng.random(500) < 0.9, y_true, rng.integers(0, 4, 500))
+    scores = _contingency_scores(y_true, y_pred)
+    assert np.isclose(scores["rand_score"], rand_score(y_true, y_pred))
+    assert np.isclose(scores["homogeneity_score"], homogeneity_score(y_true, y_pred))
+    assert np.isclose(scores["completeness_score"], completeness_score(y_true, y_pred))
+
+    y_true = np.array([0, 0, 0, 1, 1, 1])
+    y_pred = np.array([1, 1, 0, 0, 0, 0])
+    assert _contingency_scores(y_true, y_pred)["n_misclassified"] == 1
+    assert _contingency_scores(y_true, y_true)["rand_score"] == 1.0
+
 def test_errors():
     n_samples = np.array([25000, 25000, 100])
     n_features = 2